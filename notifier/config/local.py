@@ -1,17 +1,41 @@
 import logging
-import re
+import os
+from copy import deepcopy
 from pathlib import Path
-from typing import Any, Callable, Dict, cast
+from typing import Any, Callable, Dict, Tuple
 
-import tomlkit
 from typing_extensions import TypeGuard
 
 from notifier.config.remote import AWS
 from notifier.database.utils import resolve_driver_from_config
+from notifier.toml import tomllib
 from notifier.types import AuthConfig, LocalConfig
 
 logger = logging.getLogger(__name__)
 
+# Root of the package, which the '@' path alias refers to
+_package_root = str(Path(__file__).resolve().parent.parent)
+
+# Parsed TOML files, keyed by path, along with the (mtime, size) of the
+# file when it was parsed
+_toml_file_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def read_toml_file(path: str) -> Dict[str, Any]:
+    """Reads and parses a TOML file, reusing the previous parse if the file
+    has not changed since it was last read.
+
+    A copy is returned, so the caller is free to modify it.
+    """
+    stat = os.stat(path)
+    file_key = (stat.st_mtime_ns, stat.st_size)
+    cached = _toml_file_cache.get(path)
+    if cached is None or cached[0] != file_key:
+        with open(path, "rb") as file:
+            cached = (file_key, tomllib.load(file))
+        _toml_file_cache[path] = cached
+    return deepcopy(cached[1])
+
 
 def assert_key_for_scope(
     scope: str,
@@ -31,13 +55,14 @@ def read_local_config(config_path: str) -> LocalConfig:
     Raises AssertionError if there is a problem.
     """
     logger.debug("Reading local config %s", {"path": config_path})
-    with open(config_path, "r", encoding="utf-8") as config_file:
-        config = cast(Dict[str, Any], tomlkit.parse(config_file.read()))
-        logger.debug("Found config file")
+    config = read_toml_file(config_path)
+    logger.debug("Found config file")
 
     def replace_path_alias(path: str) -> str:
-        path = re.sub(r"^@", str(Path(__file__).parent.parent), path)
-        path = re.sub(r"^\?", config_path, path)
+        if path.startswith("@"):
+            path = _package_root + path[1:]
+        if path.startswith("?"):
+            path = config_path + path[1:]
         return path
 
     def is_complete_config(config: Dict[str, Any]) -> TypeGuard[LocalConfig]:
@@ -77,9 +102,8 @@ def read_local_config(config_path: str) -> LocalConfig:
 def read_local_auth(auth_path: str) -> AuthConfig:
     """Reads the local auth file from the specified path."""
     logger.debug("Reading local auth config %s", {"path": auth_path})
-    with open(auth_path, "r", encoding="utf-8") as auth_file:
-        auth = cast(Dict[str, Any], tomlkit.parse(auth_file.read()))
-        logger.debug("Found auth config file")
+    auth = read_toml_file(auth_path)
+    logger.debug("Found auth config file")
 
     # Merge local keys with any external keys
     for index, external_source in enumerate(auth.pop("external", [])):
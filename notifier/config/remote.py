@@ -3,11 +3,10 @@ import logging
 from typing import Any, Dict, List, Tuple, cast
 
 import boto3
-import tomlkit
-from tomlkit.exceptions import TOMLKitError
 
 from notifier.database.drivers.base import BaseDatabaseDriver
 from notifier.database.utils import try_cache
+from notifier.toml import tomllib
 from notifier.types import LocalConfig, SupportedWikiConfig
 from notifier.wikidot import Wikidot
 
@@ -30,7 +29,7 @@ def get_global_config(
     try_cache(
         get=lambda: fetch_supported_wikis(local_config, wikidot),
         store=database.store_supported_wikis,
-        do_not_store=[],
+        success_predicate=bool,
     )
 
 
@@ -47,12 +46,12 @@ def fetch_supported_wikis(
         raw_config = config_soup.get_text()
         try:
             configs.append(parse_raw_wiki_config(raw_config))
-        except (TOMLKitError, AssertionError) as error:
+        except (tomllib.TOMLDecodeError, AssertionError) as error:
             logger.error(
                 "Could not parse wiki config %s",
                 {
                     "raw_config": raw_config,
-                    "first_line": next(filter(bool, raw_config.split("\n"))),
+                    "first_line": raw_config.lstrip("\n").partition("\n")[0],
                 },
                 exc_info=error,
             )
@@ -62,7 +61,7 @@ def fetch_supported_wikis(
 
 def parse_raw_wiki_config(raw_config: str) -> SupportedWikiConfig:
     """Parses a raw wiki config to a suitable format."""
-    config = tomlkit.parse(raw_config)
+    config = tomllib.loads(raw_config)
     assert isinstance(config, dict)
     assert "id" in config
     assert "secure" in config
@@ -3,12 +3,10 @@ from operator import itemgetter
 import re
 from typing import List, Optional, Tuple, TypedDict, Union, cast
 
-import tomlkit
-from tomlkit.exceptions import TOMLKitError
-
 from notifier.database.drivers.base import BaseDatabaseDriver
 from notifier.database.utils import try_cache
 from notifier.parsethread import get_timestamp
+from notifier.toml import tomllib
 from notifier.types import (
     LocalConfig,
     RawUserConfig,
@@ -46,7 +44,7 @@ def get_user_config(
     try_cache(
         get=lambda: find_valid_user_configs(local_config, wikidot),
         store=database.store_user_configs,
-        do_not_store=[],
+        success_predicate=bool,
     )
 
 
@@ -101,14 +99,14 @@ def fetch_user_configs(
                 user_timestamp,
                 local_config["service_start_timestamp"],
             )
-        except (TOMLKitError, AssertionError) as error:
+        except (tomllib.TOMLDecodeError, AssertionError) as error:
             # If the parse fails, the user was probably trying code
             # injection or something - discard it
             logger.error(
                 "Could not parse user config %s",
                 {
                     "raw_config": raw_config,
-                    "first_line": next(filter(bool, raw_config.split("\n"))),
+                    "first_line": raw_config.lstrip("\n").partition("\n")[0],
                 },
                 exc_info=error,
             )
@@ -124,7 +122,7 @@ def parse_raw_user_config(
 ) -> Tuple[RawUserConfig, str]:
     """Parses a raw user config string to a suitable format, also returning
     the config slug."""
-    config = dict(tomlkit.parse(raw_config))
+    config = tomllib.loads(raw_config)
     slug = config.pop("slug", "")
     assert isinstance(slug, str)
     assert "username" in config
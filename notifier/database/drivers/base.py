@@ -10,6 +10,7 @@ from notifier.types import (
     PostInfo,
     PostMeta,
     RawUserConfig,
+    RssValidators,
     SupportedWikiConfig,
     Context,
 )
@@ -117,10 +118,26 @@ class BaseDatabaseDriver(ABC):
     ) -> None:
         """Stores the latest seen post timestamp for the given wiki."""
 
+    @abstractmethod
+    def get_rss_validators(self, wiki_id: str) -> RssValidators:
+        """Returns the cache validators from the last successfully
+        processed download of the given wiki's RSS feed."""
+
+    @abstractmethod
+    def store_rss_validators(
+        self, wiki_id: str, validators: RssValidators
+    ) -> None:
+        """Stores the cache validators from a download of the given wiki's
+        RSS feed."""
+
     @abstractmethod
     def store_post(self, post: NotifiablePost) -> None:
         """Store a post."""
 
+    @abstractmethod
+    def store_posts(self, posts: List[NotifiablePost]) -> None:
+        """Store several posts at once."""
+
     @abstractmethod
     def store_context_forum_category(
         self, context_forum_category: Context.ForumCategory
@@ -20,6 +20,7 @@ from notifier.types import (
     PostInfo,
     PostMeta,
     RawUserConfig,
+    RssValidators,
     Subscription,
     SupportedWikiConfig,
 )
@@ -103,6 +104,33 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
         cursor.execute(query, {} if params is None else params)
         return cursor
 
+    def execute_named_many(
+        self,
+        query_name: str,
+        params_list: List[Dict[str, Any]],
+        cursor: Optional[DictCursor] = None,
+    ) -> DictCursor:
+        """Execute a named query against the database once for each set of
+        params in a single call. The query is read either from file or the
+        cache.
+
+        :param query_name: The name of the query to execute, which must
+        have a corresponding SQL file.
+        :param params_list: SQL parameters to pass to each execution of
+        the query.
+        :param cursor: A cursor to use for the query. If not specified, a
+        new one will be created. The cursor will be returned.
+        :returns: The resultant cursor of the query.
+        """
+        self.cache_named_query(query_name)
+        query = self.query_cache[query_name]["query"]
+        if cursor is None:
+            cursor = self.conn.cursor()
+        if self.query_cache[query_name]["script"]:
+            raise ValueError("Script does not accept params")
+        cursor.executemany(query, params_list)
+        return cursor
+
     def scrub_database(self) -> None:
         logger.info("Scrubbing database")
         if not self.database_name.endswith("_test"):
@@ -215,16 +243,27 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
                 "get_user_configs_for_frequency", {"frequency": frequency}
             ).fetchall()
         ]
+        manual_subs_by_user_id: Dict[str, List[Subscription]] = {
+            user_config["user_id"]: [] for user_config in user_configs
+        }
+        # Subscriptions for all users of this frequency are retrieved at
+        # once rather than making a query per user
+        for row in self.execute_named(
+            "get_manual_subs_for_frequency", {"frequency": frequency}
+        ).fetchall():
+            manual_subs_by_user_id.setdefault(row["user_id"], []).append(
+                {
+                    "thread_id": row["thread_id"],
+                    "post_id": row["post_id"],
+                    "sub": row["sub"],
+                }
+            )
         for user_config in user_configs:
             # The last notified timestamp can be NULL if the user has never been notified
             if user_config["last_notified_timestamp"] is None:
                 user_config["last_notified_timestamp"] = 0
-            user_config["manual_subs"] = [
-                cast(Subscription, dict(row))
-                for row in self.execute_named(
-                    "get_manual_subs_for_user",
-                    {"user_id": user_config["user_id"]},
-                ).fetchall()
+            user_config["manual_subs"] = manual_subs_by_user_id[
+                user_config["user_id"]
             ]
         return user_configs
 
@@ -275,9 +314,9 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
                         "get_user_ids", None, cursor
                     ).fetchall()
                 ]
-                incoming_user_ids = [
+                incoming_user_ids = {
                     user_config["user_id"] for user_config in user_configs
-                ]
+                }
                 for stored_user_id in stored_user_ids:
                     if stored_user_id not in incoming_user_ids:
                         logger.debug(
@@ -314,21 +353,24 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
                     {"user_id": user_config["user_id"]},
                     cursor,
                 )
-                # Add all new subscriptions from scratch
-                for subscription in (
-                    user_config["subscriptions"]
-                    + user_config["unsubscriptions"]
-                ):
-                    self.execute_named(
-                        "store_manual_sub",
-                        {
-                            "user_id": user_config["user_id"],
-                            "thread_id": subscription["thread_id"],
-                            "post_id": subscription.get("post_id"),
-                            "sub": subscription["sub"],
-                        },
-                        cursor,
+            # Add all new subscriptions from scratch
+            self.execute_named_many(
+                "store_manual_sub",
+                [
+                    {
+                        "user_id": user_config["user_id"],
+                        "thread_id": subscription["thread_id"],
+                        "post_id": subscription.get("post_id"),
+                        "sub": subscription["sub"],
+                    }
+                    for user_config in user_configs
+                    for subscription in (
+                        user_config["subscriptions"]
+                        + user_config["unsubscriptions"]
                     )
+                ],
+                cursor,
+            )
 
     def store_user_last_notified(
         self, user_id: str, last_notified_timestamp: int
@@ -373,23 +415,56 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
             {"wiki_id": wiki_id, "timestamp": timestamp},
         )
 
-    def store_post(self, post: NotifiablePost) -> None:
+    def get_rss_validators(self, wiki_id: str) -> RssValidators:
+        return cast(
+            RssValidators,
+            self.execute_named(
+                "get_rss_validators", {"wiki_id": wiki_id}
+            ).fetchone()
+            or {"etag": None, "last_modified": None},
+        )
+
+    def store_rss_validators(
+        self, wiki_id: str, validators: RssValidators
+    ) -> None:
         self.execute_named(
-            "store_post",
+            "store_rss_validators",
             {
-                "post_id": post["post_id"],
-                "posted_timestamp": post["posted_timestamp"],
-                "post_title": post["post_title"],
-                "post_snippet": post["post_snippet"],
-                "author_user_id": post["author_user_id"],
-                "author_username": post["author_username"],
-                "context_wiki_id": post["context_wiki_id"],
-                "context_forum_category_id": post["context_forum_category_id"],
-                "context_thread_id": post["context_thread_id"],
-                "context_parent_post_id": post["context_parent_post_id"],
+                "wiki_id": wiki_id,
+                "etag": validators["etag"],
+                "last_modified": validators["last_modified"],
             },
         )
 
+    def store_post(self, post: NotifiablePost) -> None:
+        self.store_posts([post])
+
+    def store_posts(self, posts: List[NotifiablePost]) -> None:
+        with self.transaction() as cursor:
+            self.execute_named_many(
+                "store_post",
+                [
+                    {
+                        "post_id": post["post_id"],
+                        "posted_timestamp": post["posted_timestamp"],
+                        "post_title": post["post_title"],
+                        "post_snippet": post["post_snippet"],
+                        "author_user_id": post["author_user_id"],
+                        "author_username": post["author_username"],
+                        "context_wiki_id": post["context_wiki_id"],
+                        "context_forum_category_id": post[
+                            "context_forum_category_id"
+                        ],
+                        "context_thread_id": post["context_thread_id"],
+                        "context_parent_post_id": post[
+                            "context_parent_post_id"
+                        ],
+                    }
+                    for post in posts
+                ],
+                cursor,
+            )
+
     def store_context_forum_category(
         self, context_forum_category: Context.ForumCategory
     ) -> None:
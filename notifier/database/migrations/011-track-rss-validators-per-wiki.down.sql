@@ -0,0 +1,6 @@
+ALTER TABLE
+  context_wiki
+DROP COLUMN
+  rss_etag,
+DROP COLUMN
+  rss_last_modified;
@@ -0,0 +1,6 @@
+ALTER TABLE
+  context_wiki
+ADD COLUMN
+  rss_etag VARCHAR(200) NULL,
+ADD COLUMN
+  rss_last_modified VARCHAR(100) NULL;
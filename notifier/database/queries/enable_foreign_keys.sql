@@ -1 +0,0 @@
-PRAGMA foreign_keys = ON
@@ -0,0 +1,11 @@
+SELECT
+  manual_sub.user_id AS user_id,
+  manual_sub.thread_id AS thread_id,
+  manual_sub.post_id AS post_id,
+  manual_sub.sub AS sub
+FROM
+  manual_sub
+  INNER JOIN user_config
+    ON manual_sub.user_id = user_config.user_id
+WHERE
+  user_config.frequency = %(frequency)s
\ No newline at end of file
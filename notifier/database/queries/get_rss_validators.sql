@@ -0,0 +1,7 @@
+SELECT
+  rss_etag AS etag,
+  rss_last_modified AS last_modified
+FROM
+  context_wiki
+WHERE
+  context_wiki.wiki_id = %(wiki_id)s
\ No newline at end of file
@@ -24,14 +24,14 @@ VALUES
     %(context_forum_category_id)s,
     %(context_thread_id)s,
     %(context_parent_post_id)s
-  )
+  ) AS new_post
 ON DUPLICATE KEY UPDATE
-  posted_timestamp = %(posted_timestamp)s,
-  post_title = %(post_title)s,
-  post_snippet = %(post_snippet)s,
-  author_user_id = %(author_user_id)s,
-  author_username = %(author_username)s,
-  context_wiki_id = %(context_wiki_id)s,
-  context_forum_category_id = %(context_forum_category_id)s,
-  context_thread_id = %(context_thread_id)s,
-  context_parent_post_id = %(context_parent_post_id)s
\ No newline at end of file
+  posted_timestamp = new_post.posted_timestamp,
+  post_title = new_post.post_title,
+  post_snippet = new_post.post_snippet,
+  author_user_id = new_post.author_user_id,
+  author_username = new_post.author_username,
+  context_wiki_id = new_post.context_wiki_id,
+  context_forum_category_id = new_post.context_forum_category_id,
+  context_thread_id = new_post.context_thread_id,
+  context_parent_post_id = new_post.context_parent_post_id
\ No newline at end of file
@@ -3,7 +3,6 @@ from abc import ABC
 from importlib import import_module
 from pathlib import Path
 from typing import (
-    Any,
     Callable,
     Dict,
     List,
@@ -54,7 +53,7 @@ def try_cache(
     *,
     get: Callable[[], CacheValueType],
     store: Callable[[CacheValueType], None],
-    do_not_store: Optional[Any] = None,
+    success_predicate: Callable[[CacheValueType], bool] = lambda _: True,
     catch: Optional[Tuple[Type[Exception], ...]] = None,
 ) -> None:
     """Attempts to retrieve data from somewhere. If it succeeds, caches the
@@ -75,9 +74,9 @@ def try_cache(
     :param store: Callable that takes the result of `get` as its only
     argument and caches the data.
 
-    :param do_not_store: If the result of `get` is equal to this,
-    it will not be stored. Defaults to None. If `get` returning None is
-    desirable, set to a sentinel value.
+    :param success_predicate: Callable that takes the result of `get`
+    and returns whether it should be stored. Defaults to storing any
+    result. For example, pass `bool` to avoid storing an empty result.
 
     :param catch: Tuple of exceptions to catch. If `get` emits any other
     kind of error, it will not be caught. Defaults to catching no
@@ -85,13 +84,12 @@ def try_cache(
     caught, the store is not called.
 
     Functions intended to be used with this function typically either raise
-    an error or return a no-op value, so `do_not_store` and `catch` should
-    rarely be used together.
+    an error or return a no-op value, so `success_predicate` and `catch`
+    should rarely be used together.
     """
     if catch is None:
         catch = tuple()
     try:
-        value = do_not_store
         value = get()
     except catch as error:
         logger.error(
@@ -99,9 +97,10 @@ def try_cache(
             {"get": get.__name__},
             exc_info=error,
         )
-    if value == do_not_store:
         return
-    store(cast(CacheValueType, value))
+    if not success_predicate(value):
+        return
+    store(value)
 
 
 class BaseDatabaseWithSqlFileCache(ABC):
@@ -111,8 +110,9 @@ class BaseDatabaseWithSqlFileCache(ABC):
     This is so that the SQL commands can be safely edited between queries
     with no downtime.
 
-    Execute clear_query_file_cache to clear the cache and force the next
-    call to each query to re-read from the filesystem.
+    All queries are read into the cache on initialisation. Execute
+    clear_query_file_cache to clear the cache and force the next call to
+    each query to re-read from the filesystem.
     """
 
     queries_dir = Path(__file__).parent / "queries"
@@ -124,6 +124,8 @@ class BaseDatabaseWithSqlFileCache(ABC):
 
     def __init__(self) -> None:
         self.clear_query_file_cache()
+        for query_name in self.query_paths:
+            self.read_query_file(query_name)
 
     def clear_query_file_cache(self) -> None:
         """Clears the cache of query files, causing subsequent calls to
@@ -131,18 +133,18 @@ class BaseDatabaseWithSqlFileCache(ABC):
         self.query_cache: Dict[
             str, BaseDatabaseWithSqlFileCache.SqlFileCache
         ] = {}
+        self.query_paths: Dict[str, Path] = {
+            path.name.split(".")[0]: path
+            for path in self.queries_dir.iterdir()
+        }
 
     def read_query_file(self, query_name: str) -> None:
         """Reads the contents of a query file from the filesystem and
         caches it."""
         try:
-            query_path = next(
-                path
-                for path in self.queries_dir.iterdir()
-                if path.name.split(".")[0] == query_name
-            )
-        except StopIteration as stop:
-            raise ValueError(f"Query {query_name} does not exist") from stop
+            query_path = self.query_paths[query_name]
+        except KeyError as error:
+            raise ValueError(f"Query {query_name} does not exist") from error
         with query_path.open() as file:
             query = file.read()
         self.query_cache[query_name] = {
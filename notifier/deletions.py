@@ -20,6 +20,7 @@ from uuid import uuid4
 from notifier.config.user import fetch_user_configs, user_config_is_valid
 from notifier.database.drivers.base import BaseDatabaseDriver
 from notifier import timing
+from notifier.newposts import store_thread_context
 from notifier.types import LocalConfig, PostMeta
 from notifier.wikidot import Wikidot, ThreadNotExists
 
@@ -102,24 +103,8 @@ def delete_posts(
                 {"wiki_id": post["wiki_id"], "thread_id": post["thread_id"]},
             )
             thread_first_post = thread_posts[0]
-            database.store_context_thread(
-                {
-                    "thread_id": post["thread_id"],
-                    "thread_created_timestamp": thread_meta[
-                        "created_timestamp"
-                    ],
-                    "thread_title": thread_meta["title"],
-                    "thread_snippet": thread_first_post["snippet"],
-                    "thread_creator_username": thread_meta["creator_username"],
-                    "first_post_id": thread_first_post["id"],
-                    "first_post_author_user_id": thread_first_post["user_id"],
-                    "first_post_author_username": thread_first_post[
-                        "username"
-                    ],
-                    "first_post_created_timestamp": thread_first_post[
-                        "posted_timestamp"
-                    ],
-                }
+            store_thread_context(
+                post["thread_id"], thread_meta, thread_first_post, database
             )
 
         thread_posts_ids = {tp["id"] for tp in thread_posts}
@@ -17,10 +17,10 @@ from typing import (
     Match,
 )
 
-import tomlkit
 from emoji import emojize
 
 from notifier.formatter import convert_syntax
+from notifier.toml import tomllib
 from notifier.types import CachedUserConfig, IsSecure, PostInfo
 
 Lexicon = Dict[str, str]
@@ -48,10 +48,8 @@ class Digester:
 
     def __init__(self, lang_path: str):
         # Read the strings from the lang file into a lexicon
-        with open(lang_path, "r", encoding="utf-8") as lang_file:
-            self.lexicons = cast(
-                Lexicons, dict(tomlkit.parse(lang_file.read()))
-            )
+        with open(lang_path, "rb") as lang_file:
+            self.lexicons = cast(Lexicons, tomllib.load(lang_file))
 
     @lru_cache(maxsize=1)
     def make_lexicon(self, lang: str) -> Lexicon:
@@ -1,13 +1,24 @@
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
 from operator import itemgetter
-from typing import Iterator, List, Optional, Set, TypedDict
+import threading
+from typing import DefaultDict, Dict, List, Optional, Tuple, TypedDict
 import time
 
 import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from notifier.config.user import parse_thread_url
 from notifier.database.drivers.base import BaseDatabaseDriver
-from notifier.types import RawPost, RawThreadMeta
+from notifier.types import (
+    NotifiablePost,
+    RawPost,
+    RawThreadMeta,
+    RssValidators,
+)
 from notifier.wikidot import Wikidot
 
 logger = logging.getLogger(__name__)
@@ -16,6 +27,38 @@ logger = logging.getLogger(__name__)
 # work for secure wikis
 new_posts_rss = "http://{}.wikidot.com/feed/forum/posts.xml"
 
+RSS_TIMEOUT_S = 30
+
+# RSS feeds are downloaded from several threads at once, and requests
+# does not guarantee that a session is safe to share between threads, so
+# each thread has its own session that pools its connections to wikis
+_rss_sessions = threading.local()
+
+# Number of RSS feeds to download concurrently
+RSS_FETCH_WORKERS = 8
+
+RssPost = TypedDict(
+    "RssPost", {"thread_id": str, "post_id": str, "posted_timestamp": int}
+)
+
+
+def get_rss_session() -> requests.Session:
+    """Get the current thread's session for downloading RSS feeds."""
+    session: Optional[requests.Session] = getattr(
+        _rss_sessions, "session", None
+    )
+    if session is None:
+        session = requests.Session()
+        session.mount(
+            "http://",
+            HTTPAdapter(
+                pool_connections=50,
+                max_retries=Retry(total=3, backoff_factor=0.3),
+            ),
+        )
+        _rss_sessions.session = session
+    return session
+
 
 def get_new_posts(
     database: BaseDatabaseDriver,
@@ -31,29 +74,59 @@ def get_new_posts(
         wikis = [wiki for wiki in wikis if wiki["id"] in limit_wikis]
 
     logger.info("Downloading posts from wikis %s", wikis)
-    for wiki in wikis:
-        if limit_wikis is not None and wiki["id"] in limit_wikis:
-            continue
-        logger.info("Getting new posts %s", {"for wiki_id": wiki["id"]})
-        try:
-            fetch_posts_with_context(wiki["id"], database, wikidot)
-        except Exception as error:
-            logger.error(
-                "Failed getting new posts %s",
-                {"for wiki_id": wiki["id"], "reason": "unknown"},
-                exc_info=error,
+    # RSS feeds are independent of each other so are downloaded
+    # concurrently; everything else uses the database and Wikidot modules
+    # and happens one wiki at a time
+    with ThreadPoolExecutor(max_workers=RSS_FETCH_WORKERS) as executor:
+        rss_futures: Dict[
+            str, "Future[Tuple[List[RssPost], RssValidators]]"
+        ] = {}
+        for wiki in wikis:
+            rss_validators: Optional[RssValidators] = None
+            try:
+                rss_validators = database.get_rss_validators(wiki["id"])
+            except Exception as error:
+                # The feed can still be downloaded, just unconditionally
+                logger.error(
+                    "Could not get RSS validators %s",
+                    {"wiki_id": wiki["id"]},
+                    exc_info=error,
+                )
+            rss_futures[wiki["id"]] = executor.submit(
+                fetch_new_posts_rss, wiki["id"], rss_validators
             )
-            continue
+        for wiki_id, rss_future in rss_futures.items():
+            logger.info("Getting new posts %s", {"for wiki_id": wiki_id})
+            try:
+                rss_posts, rss_validators = rss_future.result()
+                fetch_posts_with_context(wiki_id, database, wikidot, rss_posts)
+                # Only skip this version of the feed in future once its
+                # posts have been stored
+                database.store_rss_validators(wiki_id, rss_validators)
+            except Exception as error:
+                logger.error(
+                    "Failed getting new posts %s",
+                    {"for wiki_id": wiki_id, "reason": "unknown"},
+                    exc_info=error,
+                )
+                continue
 
 
 def fetch_posts_with_context(
-    wiki_id: str, database: BaseDatabaseDriver, wikidot: Wikidot
+    wiki_id: str,
+    database: BaseDatabaseDriver,
+    wikidot: Wikidot,
+    all_new_posts: Optional[List[RssPost]] = None,
 ) -> None:
     """Look up new posts for a wiki and then attach their context. Stores
     the posts in the cache.
+
+    :param all_new_posts: Posts from the wiki's RSS feed, if they have
+    already been downloaded. If not given, the feed will be downloaded.
     """
     # Get the list of new posts from the forum's RSS
-    all_new_posts = list(fetch_new_posts_rss(wiki_id))
+    if all_new_posts is None:
+        all_new_posts, _ = fetch_new_posts_rss(wiki_id)
 
     # Filter out posts older than this run
     latest_post_timestamp = database.get_latest_post_timestamp(wiki_id)
@@ -81,173 +154,256 @@ def fetch_posts_with_context(
             wiki_id, max(post["posted_timestamp"] for post in new_posts)
         )
 
-    # Cache the latest downloaded thread to prevent multiple identical downloads when multiple posts share a thread
-    thread_meta: RawThreadMeta = None  # type:ignore
-    thread_page_posts: List[RawPost] = []
-
-    # Track which context threads have been downloaded so that they won't be redownloaded this run
-    context_threads_this_run: Set[str] = set()
-
+    # Group the new posts by thread so that each page of a thread is
+    # downloaded at most once, no matter how many of its posts are new.
+    # Post IDs are dict keys to deduplicate them while keeping their order
+    new_post_ids_by_thread: DefaultDict[str, Dict[str, None]] = defaultdict(
+        dict
+    )
     for new_post in new_posts:
-        thread_id = new_post["thread_id"]
-        post_id = new_post["post_id"]
-
-        # Download the thread page only if it's not already cached
-        post = next(
-            (
-                page_post
-                for page_post in thread_page_posts
-                if page_post["id"] == post_id
-            ),
-            None,
+        thread_post_ids = new_post_ids_by_thread[new_post["thread_id"]]
+        thread_post_ids[new_post["post_id"]] = None
+
+    for thread_id, post_ids in new_post_ids_by_thread.items():
+        fetch_thread_posts_with_context(
+            wiki_id, thread_id, list(post_ids), database, wikidot
         )
-        if post is None:
-            logger.debug(
-                "Downloading thread page containing post %s",
-                {
-                    "wiki_id": wiki_id,
-                    "thread_id": thread_id,
-                    "post_id": post_id,
-                },
-            )
-            thread_meta, thread_page_posts = wikidot.thread(
-                wiki_id, thread_id, post_id
-            )
-            post = next(
-                (
-                    page_post
+
+
+def fetch_thread_posts_with_context(
+    wiki_id: str,
+    thread_id: str,
+    post_ids: List[str],
+    database: BaseDatabaseDriver,
+    wikidot: Wikidot,
+) -> None:
+    """Download the given new posts in a thread and their context, and
+    store them in the cache."""
+    thread_meta: RawThreadMeta = None  # type:ignore
+    # All posts from the pages of this thread downloaded so far, indexed by
+    # ID
+    thread_posts_by_id: Dict[str, RawPost] = {}
+    thread_first_post: Optional[RawPost] = None
+    thread_context_stored = False
+    # Posts are stored together once the thread is processed
+    thread_posts_to_store: List[NotifiablePost] = []
+
+    # Posts that have been processed are stored even if a later post in
+    # the thread fails, as the wiki's latest post timestamp has already
+    # moved past them and they would not be fetched again
+    try:
+        for post_id in post_ids:
+            # Download the thread page only if the post wasn't on a page that
+            # has already been downloaded
+            post = thread_posts_by_id.get(post_id)
+            if post is None:
+                logger.debug(
+                    "Downloading thread page containing post %s",
+                    {
+                        "wiki_id": wiki_id,
+                        "thread_id": thread_id,
+                        "post_id": post_id,
+                    },
+                )
+                thread_meta, thread_page_posts = wikidot.thread(
+                    wiki_id, thread_id, post_id
+                )
+                thread_posts_by_id.update(
+                    (page_post["id"], page_post)
                     for page_post in thread_page_posts
-                    if page_post["id"] == post_id
-                ),
-                None,
-            )
-        if post is None:
-            logger.error(
-                "Requested post missing from downloaded thread %s",
-                {
-                    "wiki_id": wiki_id,
-                    "thread_id": thread_id,
-                    "post_id": post_id,
-                },
-            )
-            raise RuntimeError("Requested post missing from downloaded thread")
+                )
+                # A thread with only one page has no current page marker
+                if (
+                    thread_meta["current_page"] == 1
+                    or thread_meta["page_count"] == 1
+                ) and len(thread_page_posts) > 0:
+                    thread_first_post = thread_page_posts[0]
+                post = thread_posts_by_id.get(post_id)
+            if post is None:
+                logger.error(
+                    "Requested post missing from downloaded thread %s",
+                    {
+                        "wiki_id": wiki_id,
+                        "thread_id": thread_id,
+                        "post_id": post_id,
+                    },
+                )
+                raise RuntimeError(
+                    "Requested post missing from downloaded thread"
+                )
 
-        # For each kind of context, check if we already have it, and if not, fetch it
+            # For each kind of context, check if we already have it, and if not, fetch it
 
-        # Context: wiki
-        # The context wiki table is running double duty as the list of configured wikis, so we already have that context
+            # Context: wiki
+            # The context wiki table is running double duty as the list of configured wikis, so we already have that context
 
-        # Context: category
-        if (
-            thread_meta["category_id"] is not None
-            and thread_meta["category_name"] is not None
-        ):
-            database.store_context_forum_category(
-                {
-                    "category_id": thread_meta["category_id"],
-                    "category_name": thread_meta["category_name"],
-                }
-            )
+            # Context: category
+            if (
+                thread_meta["category_id"] is not None
+                and thread_meta["category_name"] is not None
+            ):
+                database.store_context_forum_category(
+                    {
+                        "category_id": thread_meta["category_id"],
+                        "category_name": thread_meta["category_name"],
+                    }
+                )
 
-        # Context: thread
-        if thread_id not in context_threads_this_run:
-            if thread_meta["current_page"] == 1:
-                thread_first_post: RawPost = thread_page_posts[0]
-                if thread_first_post["id"] == post_id:
+            # Context: thread
+            if not thread_context_stored:
+                if thread_first_post is None:
+                    thread_first_post = fetch_thread_first_post(
+                        wiki_id, thread_id, thread_posts_by_id, wikidot
+                    )
+                elif thread_first_post["id"] == post_id:
                     # Special case where the searched post is the first post in the thread. E.g.:
                     #   - The user is subscribed to a thread that exists but has no posts yet
                     #   - The user is subscribed to a thread that doesn't exist but will
                     #   - The user is subscribed to new thread creation (a feature that doesn't exist yet but might someday)
                     # Currently this special case is not handled - the notification will have duplicated info
                     pass
-            else:
-                logger.debug(
-                    "Downloading first thread page %s",
-                    {"wiki_id": wiki_id, "thread_id": thread_id},
+                store_thread_context(
+                    thread_id, thread_meta, thread_first_post, database
                 )
-                thread_first_post = wikidot.thread(wiki_id, thread_id)[1][0]
-            database.store_context_thread(
-                {
-                    "thread_id": thread_id,
-                    "thread_created_timestamp": thread_meta[
-                        "created_timestamp"
-                    ],
-                    "thread_title": thread_meta["title"],
-                    "thread_snippet": thread_first_post["snippet"],
-                    "thread_creator_username": thread_meta["creator_username"],
-                    "first_post_id": thread_first_post["id"],
-                    "first_post_author_user_id": thread_first_post["user_id"],
-                    "first_post_author_username": thread_first_post[
-                        "username"
-                    ],
-                    "first_post_created_timestamp": thread_first_post[
-                        "posted_timestamp"
-                    ],
-                }
+                thread_context_stored = True
+
+            # Context: parent post
+            parent_post = (
+                thread_posts_by_id.get(post["parent_post_id"])
+                if post["parent_post_id"] is not None
+                else None
             )
-            context_threads_this_run.add(thread_id)
-
-        # Context: parent post
-        parent_post = next(
-            (
-                page_post
-                for page_post in thread_page_posts
-                if page_post["id"] == post["parent_post_id"]
-            ),
-            None,
-        )
-        if parent_post is not None:
-            database.store_context_parent_post(
+            if parent_post is not None:
+                database.store_context_parent_post(
+                    {
+                        "post_id": parent_post["id"],
+                        "posted_timestamp": parent_post["posted_timestamp"],
+                        "post_title": parent_post["title"],
+                        "post_snippet": parent_post["snippet"],
+                        "author_user_id": parent_post["user_id"],
+                        "author_username": parent_post["username"],
+                    }
+                )
+
+            # Context complete
+            # Now queue the post itself to be stored
+            logger.debug("Storing post %s", {"wiki_id": wiki_id, "post": post})
+            thread_posts_to_store.append(
                 {
-                    "post_id": parent_post["id"],
-                    "posted_timestamp": parent_post["posted_timestamp"],
-                    "post_title": parent_post["title"],
-                    "post_snippet": parent_post["snippet"],
-                    "author_user_id": parent_post["user_id"],
-                    "author_username": parent_post["username"],
-                }
+                    "post_id": post["id"],
+                    "posted_timestamp": post["posted_timestamp"],
+                    "post_title": post["title"],
+                    "post_snippet": post["snippet"],
+                    "author_user_id": post["user_id"],
+                    "author_username": post["username"],
+                    "context_wiki_id": wiki_id,
+                    "context_forum_category_id": thread_meta["category_id"],
+                    "context_thread_id": thread_id,
+                    "context_parent_post_id": post["parent_post_id"],
+                },
             )
+    finally:
+        database.store_posts(thread_posts_to_store)
 
-        # Context complete
-        # Now store the post itself
-        logger.debug("Storing post %s", {"wiki_id": wiki_id, "post": post})
-        database.store_post(
-            {
-                "post_id": post["id"],
-                "posted_timestamp": post["posted_timestamp"],
-                "post_title": post["title"],
-                "post_snippet": post["snippet"],
-                "author_user_id": post["user_id"],
-                "author_username": post["username"],
-                "context_wiki_id": wiki_id,
-                "context_forum_category_id": thread_meta["category_id"],
-                "context_thread_id": thread_id,
-                "context_parent_post_id": post["parent_post_id"],
-            },
-        )
 
+def fetch_thread_first_post(
+    wiki_id: str,
+    thread_id: str,
+    thread_posts_by_id: Dict[str, RawPost],
+    wikidot: Wikidot,
+) -> RawPost:
+    """Download the first page of a thread and return its first post.
 
-RssPost = TypedDict(
-    "RssPost", {"thread_id": str, "post_id": str, "posted_timestamp": int}
-)
+    The posts on the page are added to the thread's index of downloaded
+    posts.
+    """
+    logger.debug(
+        "Downloading first thread page %s",
+        {"wiki_id": wiki_id, "thread_id": thread_id},
+    )
+    first_page_posts = wikidot.thread(wiki_id, thread_id)[1]
+    thread_posts_by_id.update(
+        (page_post["id"], page_post) for page_post in first_page_posts
+    )
+    return first_page_posts[0]
+
+
+def store_thread_context(
+    thread_id: str,
+    thread_meta: RawThreadMeta,
+    thread_first_post: RawPost,
+    database: BaseDatabaseDriver,
+) -> None:
+    """Store the context of a thread from its metadata and first post."""
+    database.store_context_thread(
+        {
+            "thread_id": thread_id,
+            "thread_created_timestamp": thread_meta["created_timestamp"],
+            "thread_title": thread_meta["title"],
+            "thread_snippet": thread_first_post["snippet"],
+            "thread_creator_username": thread_meta["creator_username"],
+            "first_post_id": thread_first_post["id"],
+            "first_post_author_user_id": thread_first_post["user_id"],
+            "first_post_author_username": thread_first_post["username"],
+            "first_post_created_timestamp": thread_first_post[
+                "posted_timestamp"
+            ],
+        }
+    )
 
 
-def fetch_new_posts_rss(wiki_id: str) -> Iterator[RssPost]:
-    """Get basic info about new posts from the wiki's RSS feed."""
+def fetch_new_posts_rss(
+    wiki_id: str, validators: Optional[RssValidators] = None
+) -> Tuple[List[RssPost], RssValidators]:
+    """Get basic info about new posts from the wiki's RSS feed.
+
+    If validators from a previous download of the feed are given, the
+    feed is only downloaded if it has changed since then; if it hasn't,
+    no posts are returned. No posts are returned if the feed could not be
+    downloaded or parsed either.
+
+    Also returns the validators for the downloaded feed.
+    """
     rss_url = new_posts_rss.format(wiki_id)
+    if validators is None:
+        validators = {"etag": None, "last_modified": None}
+    request_headers = {}
+    if validators["etag"] is not None:
+        request_headers["If-None-Match"] = validators["etag"]
+    if validators["last_modified"] is not None:
+        request_headers["If-Modified-Since"] = validators["last_modified"]
     try:
-        feed = feedparser.parse(rss_url)
+        response = get_rss_session().get(
+            rss_url, headers=request_headers, timeout=RSS_TIMEOUT_S
+        )
+        if response.status_code == 304:
+            logger.debug("RSS feed not modified %s", {"wiki_id": wiki_id})
+            return [], validators
+        response.raise_for_status()
+        feed = feedparser.parse(
+            response.content, response_headers=dict(response.headers)
+        )
     except Exception as error:  # pylint: disable=broad-except
         logger.error(
             "Could not parse RSS feed %s", {"wiki_id": wiki_id}, exc_info=error
         )
+        return [], validators
 
+    posts: List[RssPost] = []
     for entry in feed["entries"]:
         thread_id, post_id = itemgetter("thread_id", "post_id")(
             parse_thread_url(entry["id"])
         )
-        yield {
-            "thread_id": thread_id,
-            "post_id": post_id,
-            "posted_timestamp": int(time.mktime(entry["published_parsed"])),
-        }
+        posts.append(
+            {
+                "thread_id": thread_id,
+                "post_id": post_id,
+                "posted_timestamp": int(
+                    time.mktime(entry["published_parsed"])
+                ),
+            }
+        )
+    return posts, {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
@@ -0,0 +1,10 @@
+import sys
+
+# tomllib is only in the standard library from Python 3.11; tomli is the
+# same parser for older versions
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+__all__ = ["tomllib"]
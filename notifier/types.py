@@ -53,6 +53,14 @@ class SupportedWikiConfig(TypedDict):
     secure: IsSecure
 
 
+class RssValidators(TypedDict):
+    """Cache validators from the last download of a wiki's RSS feed, used
+    to only download the feed again if it has changed."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
 class AuthConfig(TypedDict):
     """Contents of the authentication config file, after processing."""
 
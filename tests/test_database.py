@@ -1,4 +1,4 @@
-from typing import List, Optional, Sequence, Set
+from typing import List, Optional, Sequence, Set, Tuple
 
 import pytest
 
@@ -354,8 +354,7 @@ def sample_database(
         db.store_context_thread(thread)
     for parent_post in sample_parent_posts:
         db.store_context_parent_post(parent_post)
-    for post in sample_posts:
-        db.store_post(post)
+    db.store_posts(sample_posts)
     for channel_log in sample_channel_log:
         db.store_channel_log_dump(channel_log)
     db.store_activation_log_dump(sample_activation_log)
@@ -686,3 +685,64 @@ def test_get_notifiable_users(sample_database: MySqlDriver) -> None:
         "53",  # T5U-Starter
         "55",  # T5U-Poster
     }
+
+
+@pytest.mark.needs_database
+def test_rss_validators(sample_database: MySqlDriver) -> None:
+    """Test that a wiki's RSS feed validators are stored and retrieved."""
+    assert sample_database.get_rss_validators("my-wiki") == {
+        "etag": None,
+        "last_modified": None,
+    }
+    sample_database.store_rss_validators(
+        "my-wiki",
+        {"etag": '"abc"', "last_modified": "Tue, 14 Nov 2023 22:13:20 GMT"},
+    )
+    assert sample_database.get_rss_validators("my-wiki") == {
+        "etag": '"abc"',
+        "last_modified": "Tue, 14 Nov 2023 22:13:20 GMT",
+    }
+    sample_database.store_rss_validators(
+        "my-wiki", {"etag": None, "last_modified": None}
+    )
+    assert sample_database.get_rss_validators("my-wiki") == {
+        "etag": None,
+        "last_modified": None,
+    }
+
+
+@pytest.mark.needs_database
+def test_store_existing_post(sample_database: MySqlDriver) -> None:
+    """Test that storing a post that is already stored updates it."""
+    post: NotifiablePost = {
+        "post_id": "p-11",
+        "posted_timestamp": 10,
+        "post_title": "Post 11",
+        "post_snippet": "",
+        "author_user_id": "1",
+        "author_username": "UserR1",
+        "context_wiki_id": "my-wiki",
+        "context_forum_category_id": None,
+        "context_thread_id": "t-1",
+        "context_parent_post_id": None,
+    }
+
+    def get_stored_post() -> Tuple[str, str]:
+        with sample_database.transaction() as cursor:
+            cursor.execute(
+                """
+                SELECT post_title, post_snippet
+                FROM notifiable_post
+                WHERE post_id='p-11'
+                """
+            )
+            row = cursor.fetchone() or {}
+            return row["post_title"], row["post_snippet"]
+
+    assert get_stored_post() == ("Post 11", "")
+    sample_database.store_posts(
+        [{**post, "post_title": "Post 11 (edited)", "post_snippet": "Edit"}]
+    )
+    assert get_stored_post() == ("Post 11 (edited)", "Edit")
+    sample_database.store_post(post)
+    assert get_stored_post() == ("Post 11", "")
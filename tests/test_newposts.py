@@ -1,5 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+
+import pytest
 from _pytest.monkeypatch import MonkeyPatch
-from notifier.newposts import fetch_new_posts_rss
+from requests import Response, Session
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from notifier.database.drivers.base import BaseDatabaseDriver
+from notifier.newposts import (
+    RssPost,
+    fetch_new_posts_rss,
+    fetch_posts_with_context,
+    get_new_posts,
+    get_rss_session,
+)
+from notifier.types import (
+    Context,
+    NotifiablePost,
+    RawPost,
+    RawThreadMeta,
+    RssValidators,
+    SupportedWikiConfig,
+)
+from notifier.wikidot import Wikidot
 
 
 sample_rss_xml = """
@@ -81,13 +104,31 @@ sample_rss_xml = """
 """
 
 
+def serve_rss(
+    monkeypatch: MonkeyPatch, fake_get: Callable[..., Response]
+) -> None:
+    """Download RSS feeds with the given function instead of from Wikidot."""
+    session = Session()
+    monkeypatch.setattr(session, "get", fake_get)
+    monkeypatch.setattr("notifier.newposts.get_rss_session", lambda: session)
+
+
 def test_rss_parse(monkeypatch: MonkeyPatch) -> None:
     """Test that RSS feeds are parsed as expected."""
 
     # Disable wiki_id to URL interpolation
     monkeypatch.setattr("notifier.newposts.new_posts_rss", "{}")
 
-    new_posts = list(fetch_new_posts_rss(sample_rss_xml))
+    # Serve the 'URL' (i.e. the sample XML) as the response body
+    def fake_get(url: str, **_: Any) -> Response:
+        response = Response()
+        response.status_code = 200
+        response._content = url.encode()  # pylint: disable=protected-access
+        return response
+
+    serve_rss(monkeypatch, fake_get)
+
+    new_posts, _ = fetch_new_posts_rss(sample_rss_xml)
     assert new_posts == [
         {
             "thread_id": "t-1",
@@ -110,3 +151,317 @@ def test_rss_parse(monkeypatch: MonkeyPatch) -> None:
             "posted_timestamp": 1700000000,
         },
     ]
+
+
+def test_rss_not_modified(monkeypatch: MonkeyPatch) -> None:
+    """Test that an unchanged RSS feed is not parsed."""
+
+    def fake_get(_: str, **kwargs: Any) -> Response:
+        assert kwargs["headers"] == {"If-None-Match": '"abc"'}
+        response = Response()
+        response.status_code = 304
+        return response
+
+    serve_rss(monkeypatch, fake_get)
+
+    new_posts, validators = fetch_new_posts_rss(
+        "scp-wiki", {"etag": '"abc"', "last_modified": None}
+    )
+    assert len(new_posts) == 0
+    assert validators == {"etag": '"abc"', "last_modified": None}
+
+
+def test_rss_download_failure(monkeypatch: MonkeyPatch) -> None:
+    """Test that a failed RSS download produces no posts."""
+
+    def fake_get(_: str, **__: Any) -> Response:
+        raise RequestsConnectionError
+
+    serve_rss(monkeypatch, fake_get)
+
+    new_posts, validators = fetch_new_posts_rss(
+        "scp-wiki", {"etag": '"abc"', "last_modified": None}
+    )
+    assert len(new_posts) == 0
+    assert validators == {"etag": '"abc"', "last_modified": None}
+
+
+def test_rss_session_per_thread() -> None:
+    """Test that each thread reuses its own RSS session."""
+    assert get_rss_session() is get_rss_session()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other_thread_session = executor.submit(get_rss_session).result()
+    assert other_thread_session is not get_rss_session()
+
+
+def test_get_new_posts(monkeypatch: MonkeyPatch) -> None:
+    """Test that RSS feeds downloaded concurrently are processed for each
+    wiki, and that a wiki whose validators can't be looked up still has
+    its feed downloaded."""
+
+    class StubDatabase:
+        """Database driver with just enough to get new posts."""
+
+        def __init__(self) -> None:
+            self.stored_validators: Dict[str, RssValidators] = {}
+
+        def get_supported_wikis(self) -> List[SupportedWikiConfig]:
+            """Four wikis are configured."""
+            return [
+                {"id": wiki_id, "name": wiki_id, "secure": 1}
+                for wiki_id in ["wiki-a", "wiki-b", "wiki-c", "wiki-d"]
+            ]
+
+        def get_rss_validators(self, wiki_id: str) -> RssValidators:
+            """Every wiki has an old feed, but one can't be looked up."""
+            if wiki_id == "wiki-c":
+                raise RuntimeError("Database unavailable")
+            return {"etag": f'"{wiki_id}-old"', "last_modified": None}
+
+        def store_rss_validators(
+            self, wiki_id: str, validators: RssValidators
+        ) -> None:
+            """Record the validators stored for each wiki."""
+            self.stored_validators[wiki_id] = validators
+
+    request_headers: Dict[str, Dict[str, str]] = {}
+
+    def fake_get(url: str, **kwargs: Any) -> Response:
+        wiki_id = url.split("/")[2].split(".")[0]
+        request_headers[wiki_id] = kwargs["headers"]
+        response = Response()
+        response.status_code = 200
+        response.headers["ETag"] = f'"{wiki_id}-new"'
+        content = sample_rss_xml.encode()
+        response._content = content  # pylint: disable=protected-access
+        return response
+
+    processed: Dict[str, int] = {}
+
+    def fake_fetch_posts_with_context(
+        wiki_id: str,
+        _: BaseDatabaseDriver,
+        __: Wikidot,
+        all_new_posts: Optional[List[RssPost]] = None,
+    ) -> None:
+        assert all_new_posts is not None
+        processed[wiki_id] = len(all_new_posts)
+
+    serve_rss(monkeypatch, fake_get)
+    monkeypatch.setattr(
+        "notifier.newposts.fetch_posts_with_context",
+        fake_fetch_posts_with_context,
+    )
+
+    database = StubDatabase()
+    get_new_posts(
+        cast(BaseDatabaseDriver, database),
+        cast(Wikidot, None),
+        limit_wikis=["wiki-a", "wiki-b", "wiki-c"],
+    )
+    # wiki-d was not requested
+    assert request_headers == {
+        "wiki-a": {"If-None-Match": '"wiki-a-old"'},
+        "wiki-b": {"If-None-Match": '"wiki-b-old"'},
+        # wiki-c's validators could not be looked up
+        "wiki-c": {},
+    }
+    assert processed == {"wiki-a": 4, "wiki-b": 4, "wiki-c": 4}
+    assert database.stored_validators == {
+        "wiki-a": {"etag": '"wiki-a-new"', "last_modified": None},
+        "wiki-b": {"etag": '"wiki-b-new"', "last_modified": None},
+        "wiki-c": {"etag": '"wiki-c-new"', "last_modified": None},
+    }
+
+
+def test_rss_error_status(monkeypatch: MonkeyPatch) -> None:
+    """Test that an error response produces no posts and keeps the
+    previous validators."""
+
+    def fake_get(_: str, **__: Any) -> Response:
+        response = Response()
+        response.status_code = 503
+        response.headers["ETag"] = '"error-page"'
+        content = b"Service unavailable"
+        response._content = content  # pylint: disable=protected-access
+        return response
+
+    serve_rss(monkeypatch, fake_get)
+
+    new_posts, validators = fetch_new_posts_rss(
+        "scp-wiki", {"etag": '"abc"', "last_modified": None}
+    )
+    assert len(new_posts) == 0
+    assert validators == {"etag": '"abc"', "last_modified": None}
+
+
+def raw_post(post_id: str, parent_post_id: Optional[str] = None) -> RawPost:
+    """Make a post in thread t-1, timestamped by its ID."""
+    return {
+        "id": post_id,
+        "thread_id": "t-1",
+        "parent_post_id": parent_post_id,
+        "posted_timestamp": int(post_id.lstrip("p-")),
+        "title": "",
+        "snippet": f"Snippet {post_id}",
+        "user_id": "1",
+        "username": "User",
+    }
+
+
+class StubWikidot:  # pylint: disable=too-few-public-methods
+    """Serves the pages of thread t-1 and records which were requested."""
+
+    def __init__(self, pages: List[List[RawPost]]) -> None:
+        self.pages = pages
+        self.requests: List[Optional[str]] = []
+
+    def thread(
+        self,
+        _: str,
+        __: str,
+        containing_post_id: Optional[str] = None,
+    ) -> Tuple[RawThreadMeta, List[RawPost]]:
+        """Return the page containing the post, or the first page."""
+        self.requests.append(containing_post_id)
+        page_number = next(
+            (
+                number
+                for number, page in enumerate(self.pages, start=1)
+                if any(post["id"] == containing_post_id for post in page)
+            ),
+            1,
+        )
+        return {
+            "title": "Thread 1",
+            "category_id": None,
+            "category_name": None,
+            "creator_username": "User",
+            "created_timestamp": 1,
+            "page_count": len(self.pages),
+            # Wikidot only marks the current page if there are several
+            "current_page": page_number if len(self.pages) > 1 else None,
+        }, self.pages[page_number - 1]
+
+
+class StubPostsDatabase:
+    """Records the posts and context stored for a wiki."""
+
+    def __init__(self) -> None:
+        self.latest_post_timestamp = 0
+        self.threads: List[Context.Thread] = []
+        self.parent_posts: List[Context.ParentPost] = []
+        self.posts: List[NotifiablePost] = []
+
+    def get_latest_post_timestamp(self, _: str) -> int:
+        """Return the latest timestamp stored."""
+        return self.latest_post_timestamp
+
+    def store_latest_post_timestamp(self, _: str, timestamp: int) -> None:
+        """Store the latest timestamp."""
+        self.latest_post_timestamp = timestamp
+
+    def store_context_thread(self, context_thread: Context.Thread) -> None:
+        """Record thread context."""
+        self.threads.append(context_thread)
+
+    def store_context_parent_post(
+        self, context_parent_post: Context.ParentPost
+    ) -> None:
+        """Record parent post context."""
+        self.parent_posts.append(context_parent_post)
+
+    def store_posts(self, posts: List[NotifiablePost]) -> None:
+        """Record posts."""
+        self.posts.extend(posts)
+
+
+def rss_posts(*post_ids: str) -> List[RssPost]:
+    """Make RSS feed entries for posts in thread t-1."""
+    return [
+        {
+            "thread_id": "t-1",
+            "post_id": post_id,
+            "posted_timestamp": int(post_id.lstrip("p-")),
+        }
+        for post_id in post_ids
+    ]
+
+
+def test_fetch_several_posts_on_one_page() -> None:
+    """Test that a thread page with several new posts is downloaded once."""
+    wikidot = StubWikidot(
+        [
+            [raw_post("p-11"), raw_post("p-12")],
+            [raw_post("p-21"), raw_post("p-22"), raw_post("p-23")],
+        ]
+    )
+    database = StubPostsDatabase()
+    database.latest_post_timestamp = 12
+    fetch_posts_with_context(
+        "my-wiki",
+        cast(BaseDatabaseDriver, database),
+        cast(Wikidot, wikidot),
+        rss_posts("p-23", "p-22", "p-22", "p-12"),
+    )
+    # One request for the page with the new posts, and one for the first
+    # page for the thread context
+    assert wikidot.requests == ["p-22", None]
+    assert [post["post_id"] for post in database.posts] == ["p-22", "p-23"]
+    assert [thread["first_post_id"] for thread in database.threads] == ["p-11"]
+    assert database.latest_post_timestamp == 23
+
+
+def test_fetch_post_with_parent_on_earlier_page() -> None:
+    """Test that a post's parent on the first page is stored as context."""
+    wikidot = StubWikidot(
+        [
+            [raw_post("p-11"), raw_post("p-12")],
+            [raw_post("p-21", parent_post_id="p-12")],
+        ]
+    )
+    database = StubPostsDatabase()
+    fetch_posts_with_context(
+        "my-wiki",
+        cast(BaseDatabaseDriver, database),
+        cast(Wikidot, wikidot),
+        rss_posts("p-21"),
+    )
+    assert wikidot.requests == ["p-21", None]
+    assert [post["post_id"] for post in database.parent_posts] == ["p-12"]
+    assert database.posts[0]["context_parent_post_id"] == "p-12"
+
+
+def test_fetch_posts_in_single_page_thread() -> None:
+    """Test that the only page of a thread is not downloaded again for the
+    thread context."""
+    wikidot = StubWikidot(
+        [[raw_post("p-11"), raw_post("p-12", parent_post_id="p-11")]]
+    )
+    database = StubPostsDatabase()
+    fetch_posts_with_context(
+        "my-wiki",
+        cast(BaseDatabaseDriver, database),
+        cast(Wikidot, wikidot),
+        rss_posts("p-12"),
+    )
+    assert wikidot.requests == ["p-12"]
+    assert [thread["first_post_id"] for thread in database.threads] == ["p-11"]
+    assert [post["post_id"] for post in database.parent_posts] == ["p-11"]
+    assert [post["post_id"] for post in database.posts] == ["p-12"]
+
+
+def test_fetch_posts_stores_posts_before_failure() -> None:
+    """Test that posts processed before a failure in the same thread are
+    still stored."""
+    wikidot = StubWikidot([[raw_post("p-11"), raw_post("p-12")]])
+    database = StubPostsDatabase()
+    with pytest.raises(RuntimeError):
+        fetch_posts_with_context(
+            "my-wiki",
+            cast(BaseDatabaseDriver, database),
+            cast(Wikidot, wikidot),
+            # p-99 is not in the thread
+            rss_posts("p-12", "p-99"),
+        )
+    assert [post["post_id"] for post in database.posts] == ["p-12"]